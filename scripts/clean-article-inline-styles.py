@@ -7,52 +7,93 @@ Usage:
     python3 clean-article-inline-styles.py           # Process all posts
     python3 clean-article-inline-styles.py --dry-run # Preview changes
     python3 clean-article-inline-styles.py --single posts/2025/10/file.html
+    python3 clean-article-inline-styles.py --no-cache # Re-scan unchanged posts too
 """
 
 import os
 import re
+import sys
+import json
+import mmap
+import hashlib
+import stat
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
+from typing import Optional, Tuple
 
 # Base directory
 POSTS_DIR = Path(__file__).parent.parent / "posts"
 
-# Replacement patterns (order matters - more specific first)
-REPLACEMENTS = [
+# Maps post path -> [mtime_ns, sha1] of files known to be clean
+CACHE_FILE = POSTS_DIR.parent / ".clean-cache.json"
+
+# Fixed-string replacements (no regex needed) - applied first via bytes.replace
+_RAW_LITERAL_REPLACEMENTS = [
     # Article container - remove 'container' class
     (
-        r'<article class="article-content container">',
+        '<article class="article-content container">',
         '<article class="article-content">'
     ),
 
     # Key takeaways box - remove inline styles
     (
-        r'<div class="key-takeaways" style="[^"]*">',
-        '<div class="key-takeaways">'
-    ),
-    (
-        r'<h3 style="color: white; margin-bottom: 1rem;">Key Takeaways</h3>',
+        '<h3 style="color: white; margin-bottom: 1rem;">Key Takeaways</h3>',
         '<h3>Key Takeaways</h3>'
     ),
     (
-        r'<ul style="list-style: none; padding: 0;">',
+        '<ul style="list-style: none; padding: 0;">',
         '<ul>'
     ),
     (
-        r'<li style="margin-bottom: 0\.75rem;">',
+        '<li style="margin-bottom: 0.75rem;">',
         '<li>'
     ),
 
-    # Info box - remove inline styles
+    # Warning/Caution box - convert to warning-box class
     (
-        r'<div class="info-box" style="[^"]*">',
-        '<div class="info-box">'
+        '<div style="background: #fef2f2; border-left: 4px solid #ef4444; padding: 1.5rem; margin: 1.5rem 0; border-radius: 0 8px 8px 0;">',
+        '<div class="warning-box">'
     ),
 
-    # Warning/Caution box - convert to warning-box class
+    # CTA box - remove inline styles
     (
-        r'<div style="background: #fef2f2; border-left: 4px solid #ef4444; padding: 1\.5rem; margin: 1\.5rem 0; border-radius: 0 8px 8px 0;">',
-        '<div class="warning-box">'
+        '<h3 style="color: white; font-size: 2rem; margin: 0 0 1rem 0;">',
+        '<h3>'
+    ),
+    (
+        '<p style="font-size: 1.2rem; margin-bottom: 1.5rem;">',
+        '<p>'
+    ),
+
+    # Related posts section
+    (
+        '<div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 1.5rem;">',
+        '<div class="related-posts-grid">'
+    ),
+    (
+        '<div style="border: 1px solid #e2e8f0; border-radius: 8px; padding: 1.5rem;">',
+        '<div class="related-post-card">'
+    ),
+    (
+        '<p style="margin: 0; color: #64748b;">',
+        '<p>'
+    ),
+]
+
+# Regex replacement patterns (order matters - more specific first)
+_RAW_REGEX_REPLACEMENTS = [
+    # Key takeaways box - remove inline styles
+    (
+        r'<div class="key-takeaways" style="[^"]*">',
+        '<div class="key-takeaways">'
+    ),
+
+    # Info box - remove inline styles
+    (
+        r'<div class="info-box" style="[^"]*">',
+        '<div class="info-box">'
     ),
 
     # Success box
@@ -88,14 +129,6 @@ REPLACEMENTS = [
         r'<div class="cta-box" style="[^"]*">',
         '<div class="cta-box">'
     ),
-    (
-        r'<h3 style="color: white; font-size: 2rem; margin: 0 0 1rem 0;">',
-        '<h3>'
-    ),
-    (
-        r'<p style="font-size: 1\.2rem; margin-bottom: 1\.5rem;">',
-        '<p>'
-    ),
     (
         r'<a href="([^"]*)" class="cta-button" style="[^"]*">',
         r'<a href="\1" class="cta-button">'
@@ -110,22 +143,10 @@ REPLACEMENTS = [
         r'<h3 style="font-size: 1\.5rem; margin-bottom: 1\.5rem;">([^<]*)</h3>',
         r'<h3>\1</h3>'
     ),
-    (
-        r'<div style="display: grid; grid-template-columns: repeat\(auto-fit, minmax\(300px, 1fr\)\); gap: 1\.5rem;">',
-        '<div class="related-posts-grid">'
-    ),
-    (
-        r'<div style="border: 1px solid #e2e8f0; border-radius: 8px; padding: 1\.5rem;">',
-        '<div class="related-post-card">'
-    ),
     (
         r'<h4 style="margin: 0 0 0\.5rem 0;"><a href="([^"]*)" style="color: #0ea5e9;">([^<]*)</a></h4>',
         r'<h4><a href="\1">\2</a></h4>'
     ),
-    (
-        r'<p style="margin: 0; color: #64748b;">',
-        '<p>'
-    ),
 
     # Step-by-step sections with inline styles
     (
@@ -150,30 +171,135 @@ REPLACEMENTS = [
     ),
 ]
 
+# Files are processed as raw bytes: every rule is ASCII and UTF-8 never
+# reuses ASCII byte values, so no decode/encode round-trip is needed
+LITERAL_REPLACEMENTS = [(old.encode(), new.encode()) for old, new in _RAW_LITERAL_REPLACEMENTS]
+
+# Compile once at import instead of on every re.sub call
+REGEX_REPLACEMENTS = [
+    (re.compile(pattern.encode()), replacement.encode())
+    for pattern, replacement in _RAW_REGEX_REPLACEMENTS
+]
+
+# All patterns fused into one alternation so each file is scanned once.
+# Alternatives are tried in list order at each position, preserving priority.
+COMBINED_PATTERN = re.compile(
+    "|".join(
+        f"(?P<p{i}>{pattern})" for i, (pattern, _) in enumerate(_RAW_REGEX_REPLACEMENTS)
+    ).encode()
+)
 
-def clean_html_file(filepath: Path, dry_run: bool = False) -> bool:
-    """Clean inline styles from a single HTML file."""
+# Cached results are only valid for the rules they were produced with
+RULES_FINGERPRINT = hashlib.sha1(
+    repr((_RAW_LITERAL_REPLACEMENTS, _RAW_REGEX_REPLACEMENTS)).encode()
+).hexdigest()
+
+
+def _replace_match(match: re.Match) -> bytes:
+    """Apply the replacement belonging to whichever pattern matched."""
+    pattern, replacement = REGEX_REPLACEMENTS[int(match.lastgroup[1:])]
+    # Re-run the single pattern on the matched span so its own \1-style
+    # group references resolve correctly
+    return pattern.sub(replacement, match.group())
+
+
+def load_cache() -> dict:
+    """Load the clean-file cache, discarding it if the rules have changed."""
     try:
-        content = filepath.read_text(encoding='utf-8')
-        original = content
+        cache = json.loads(CACHE_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get('rules') != RULES_FINGERPRINT:
+        return {}
+    return cache.get('files', {})
+
 
-        for pattern, replacement in REPLACEMENTS:
-            content = re.sub(pattern, replacement, content)
+def save_cache(entries: dict):
+    """Persist the clean-file cache."""
+    data = {'rules': RULES_FINGERPRINT, 'files': entries}
+    CACHE_FILE.write_text(json.dumps(data, indent=2, sort_keys=True) + '\n', encoding='utf-8')
 
-        if content != original:
-            if not dry_run:
-                filepath.write_text(content, encoding='utf-8')
-            return True
+
+def _needs_cleaning(data) -> bool:
+    """Read-only check for whether any rule matches; works on bytes or mmap."""
+    # Every rule targets either an inline style or the article container.
+    # (find rather than `in`: mmap's `in` only tests single bytes.)
+    if data.find(b'style="') == -1 and data.find(b'class="article-content container"') == -1:
         return False
+    if any(data.find(old) != -1 for old, _ in LITERAL_REPLACEMENTS):
+        return True
+    return COMBINED_PATTERN.search(data) is not None
+
+
+def _write_atomic(filepath: Path, content: bytes, mode: int):
+    """Write via a sibling temp file and os.replace so a post is never left half-written."""
+    tmp_path = filepath.with_suffix(filepath.suffix + '.tmp')
+    try:
+        tmp_path.write_bytes(content)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def clean_html_file(
+    filepath: Path, dry_run: bool = False, cache_entry: Optional[list] = None
+) -> Tuple[bool, Optional[list]]:
+    """Clean inline styles from a single HTML file.
+
+    Returns whether the file changed, plus the [mtime_ns, sha1] cache entry
+    to record for it (None if it should not be cached).
+    """
+    try:
+        st = filepath.stat()
+        mtime_ns = st.st_mtime_ns
+        if cache_entry and cache_entry[0] == mtime_ns:
+            return False, cache_entry
+
+        if st.st_size == 0:
+            return False, [mtime_ns, hashlib.sha1().hexdigest()]
+
+        # Hash and pre-check through a read-only mapping so clean files are
+        # never copied into memory; only materialize when a rewrite is due
+        with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            digest = hashlib.sha1(mm).hexdigest()
+
+            # Touched (e.g. by a checkout) but identical to the last clean version
+            if cache_entry and cache_entry[1] == digest:
+                return False, [mtime_ns, digest]
+
+            if not _needs_cleaning(mm):
+                return False, [mtime_ns, digest]
+
+            if dry_run:
+                return True, None
+
+            content = mm[:]
+
+        # Rewrite and detect in the same pass instead of comparing buffers after
+        changed = False
+        for old, new in LITERAL_REPLACEMENTS:
+            if old in content:
+                content = content.replace(old, new)
+                changed = True
+
+        content, count = COMBINED_PATTERN.subn(_replace_match, content)
+
+        if changed or count:
+            _write_atomic(filepath, content, stat.S_IMODE(st.st_mode))
+            return True, [filepath.stat().st_mtime_ns, hashlib.sha1(content).hexdigest()]
+        return False, [mtime_ns, digest]
     except Exception as e:
         print(f"Error processing {filepath}: {e}")
-        return False
+        return False, None
 
 
 def main():
     parser = argparse.ArgumentParser(description='Clean inline styles from blog posts')
     parser.add_argument('--dry-run', action='store_true', help='Preview changes without writing')
     parser.add_argument('--single', type=str, help='Process single file')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore cached results and re-scan every post')
     args = parser.parse_args()
 
     print("Cleaning inline styles from blog posts...")
@@ -182,7 +308,7 @@ def main():
     if args.single:
         filepath = POSTS_DIR.parent / args.single
         if filepath.exists():
-            changed = clean_html_file(filepath, args.dry_run)
+            changed, _ = clean_html_file(filepath, args.dry_run)
             status = "Would update" if args.dry_run else "Updated" if changed else "No changes"
             print(f"  {status}: {args.single}")
         else:
@@ -190,23 +316,49 @@ def main():
         return
 
     # Process all HTML files in posts directory
-    html_files = list(POSTS_DIR.rglob("*.html"))
+    # os.walk (scandir-based) avoids building a Path for every directory entry
+    html_files = sorted(
+        Path(root) / name
+        for root, _, names in os.walk(POSTS_DIR)
+        for name in names
+        if name.endswith('.html')
+    )
+    relative_paths = [filepath.relative_to(POSTS_DIR.parent) for filepath in html_files]
     updated = 0
 
-    for filepath in sorted(html_files):
-        relative_path = filepath.relative_to(POSTS_DIR.parent)
-        changed = clean_html_file(filepath, args.dry_run)
+    # Files unchanged since their last clean are skipped without being read
+    cache = {} if args.no_cache else load_cache()
+    cache_entries = [cache.get(relative_path.as_posix()) for relative_path in relative_paths]
+
+    # Files are independent, so spread the regex work across all cores.
+    # Flush first so worker error messages appear after the header.
+    sys.stdout.flush()
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(
+            clean_html_file, html_files, repeat(args.dry_run), cache_entries, chunksize=8
+        ))
 
+    # Build the report in memory and emit it with a single write
+    lines = []
+    for relative_path, (changed, _) in zip(relative_paths, results):
         if changed:
             status = "Would update" if args.dry_run else "Updated"
-            print(f"  {status}: {relative_path}")
+            lines.append(f"  {status}: {relative_path}")
             updated += 1
         else:
-            print(f"  No changes: {relative_path}")
+            lines.append(f"  No changes: {relative_path}")
 
-    print("-" * 50)
+    lines.append("-" * 50)
     action = "Would update" if args.dry_run else "Updated"
-    print(f"{action} {updated}/{len(html_files)} posts")
+    lines.append(f"{action} {updated}/{len(html_files)} posts")
+    sys.stdout.write("\n".join(lines) + "\n")
+
+    if not args.dry_run:
+        save_cache({
+            relative_path.as_posix(): entry
+            for relative_path, (_, entry) in zip(relative_paths, results)
+            if entry is not None
+        })
 
 
 if __name__ == "__main__":
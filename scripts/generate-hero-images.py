@@ -9,6 +9,10 @@ Usage:
 
 Requirements:
     pip install google-genai python-dotenv pillow
+    (pillow-simd can replace pillow as a drop-in for faster resize/encode)
+
+    Optional: pip install opencv-python-headless numpy
+    (resizes with OpenCV's SIMD LANCZOS4 kernel instead of Pillow when present)
 
 Configuration:
     GEMINI_API_KEY in /home/rajesh/.rajesh/health/.env
@@ -16,13 +20,20 @@ Configuration:
 
 import os
 import sys
+import asyncio
 import argparse
+from io import BytesIO
 from pathlib import Path
 from dotenv import load_dotenv
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 from PIL import Image
-import time
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
 
 # Load API key
 load_dotenv("/home/rajesh/.rajesh/health/.env")
@@ -36,90 +47,162 @@ if not GEMINI_API_KEY:
 client = genai.Client(api_key=GEMINI_API_KEY)
 MODEL = "gemini-2.5-flash-image"
 
+# Maximum image requests in flight at once
+MAX_CONCURRENT_REQUESTS = 3
+
+# Attempts per image when the API responds with HTTP 429 (rate limited)
+MAX_ATTEMPTS = 5
+
 # Default output directory (can be overridden)
 DEFAULT_OUTPUT_DIR = Path("/home/rajesh/trade.gheware.com/assets/images")
 
+# Boilerplate shared by every configured prompt; only the subject varies
+PROMPT_PREFIX = "Generate an image: Professional blog hero image for "
+PROMPT_SUFFIX = " Clean modern design. Professional finance aesthetic. Landscape orientation 16:9."
+
 # Blog hero image configurations
 HERO_CONFIGS = [
     {
         "filename": "import-zerodha-portfolio-hero.png",
-        "prompt": "Generate an image: Professional blog hero image for investment portfolio import. Modern smartphone displaying portfolio dashboard with green growth charts, stock prices, and financial data. Clean navy blue gradient background. Professional investment finance aesthetic. High contrast, cinematic lighting. Landscape orientation 16:9."
+        "subject": "investment portfolio import. Modern smartphone displaying portfolio dashboard with green growth charts, stock prices, and financial data. Clean navy blue gradient background. High contrast, cinematic lighting."
     },
     {
         "filename": "manual-csv-portfolio-import-hero.png",
-        "prompt": "Generate an image: Professional blog hero image for CSV data import. Spreadsheet transforming into beautiful dashboard visualization, data flow with blue accents. Clean modern design. Professional finance aesthetic. High contrast, cinematic lighting. Landscape orientation 16:9."
+        "subject": "CSV data import. Spreadsheet transforming into beautiful dashboard visualization, data flow with blue accents. High contrast, cinematic lighting."
     },
     {
         "filename": "setting-up-smart-alerts-hero.png",
-        "prompt": "Generate an image: Professional blog hero image for smart alerts. Bell notification icons with stock charts, alert dashboard interface, protective shield with financial graphs. Orange/gold accent color. Clean modern design. Professional finance aesthetic. Landscape orientation 16:9."
+        "subject": "smart alerts. Bell notification icons with stock charts, alert dashboard interface, protective shield with financial graphs. Orange/gold accent color."
     },
     {
         "filename": "ai-stock-discovery-hero.png",
-        "prompt": "Generate an image: Professional blog hero image for AI stock discovery. AI brain analyzing stock charts, neural network patterns over financial data, futuristic investment analysis. Purple accent color. Clean modern design. Professional finance aesthetic. Landscape orientation 16:9."
+        "subject": "AI stock discovery. AI brain analyzing stock charts, neural network patterns over financial data, futuristic investment analysis. Purple accent color."
     },
     {
         "filename": "portfolio-diversification-hero.png",
-        "prompt": "Generate an image: Professional blog hero image for portfolio diversification. Colorful pie chart showing asset allocation, diverse investment baskets, balanced portfolio visualization. Green accent color. Clean modern design. Professional finance aesthetic. Landscape orientation 16:9."
+        "subject": "portfolio diversification. Colorful pie chart showing asset allocation, diverse investment baskets, balanced portfolio visualization. Green accent color."
     },
     {
         "filename": "introduction-to-investing-hero.png",
-        "prompt": "Generate an image: Professional blog hero image for introduction to investing. Seed growing into money tree, compound growth visualization, growth charts. Emerald green accent. Clean modern design. Professional finance aesthetic. Landscape orientation 16:9."
+        "subject": "introduction to investing. Seed growing into money tree, compound growth visualization, growth charts. Emerald green accent."
     },
     {
         "filename": "getting-started-hero.png",
-        "prompt": "Generate an image: Professional blog hero image for portfolio tracking. Clean dashboard with portfolio metrics, real-time stock prices, returns visualization. Sky blue accent. Clean modern design. Professional finance aesthetic. Landscape orientation 16:9."
+        "subject": "portfolio tracking. Clean dashboard with portfolio metrics, real-time stock prices, returns visualization. Sky blue accent."
     },
     {
         "filename": "ai-powered-stock-discovery-hero.png",
-        "prompt": "Generate an image: Professional blog hero image for AI-powered stock discovery revolution. Futuristic AI interface analyzing Indian stock market data, machine learning visualization, robot analyzing charts. Blue and purple gradient. Clean modern design. Professional finance aesthetic. Landscape 16:9."
+        "subject": "AI-powered stock discovery revolution. Futuristic AI interface analyzing Indian stock market data, machine learning visualization, robot analyzing charts. Blue and purple gradient."
     },
     {
         "filename": "understanding-diversification-hero.png",
-        "prompt": "Generate an image: Professional blog hero image for understanding portfolio diversification. Multiple baskets with different colored eggs, pie chart segments, risk balance scale. Green and blue accents. Clean modern design. Professional finance aesthetic. Landscape 16:9."
+        "subject": "understanding portfolio diversification. Multiple baskets with different colored eggs, pie chart segments, risk balance scale. Green and blue accents."
     }
 ]
 
 
-def generate_hero_image(prompt: str, output_path: Path, width: int = 1200, height: int = 630) -> bool:
-    """Generate a single hero image using Gemini"""
+def build_prompt(config: dict) -> str:
+    """Assemble the full prompt for a configured image"""
+    return f"{PROMPT_PREFIX}{config['subject']}{PROMPT_SUFFIX}"
 
-    temp_path = Path("/tmp") / f"hero_raw_{output_path.name}"
 
-    try:
-        response = client.models.generate_content(
-            model=MODEL,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_modalities=["IMAGE", "TEXT"],
+def _save_resized_cv2(image_data: bytes, output_path: Path, width: int, height: int):
+    """Decode, resize and save with OpenCV's vectorized LANCZOS4 kernel"""
+    img = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_UNCHANGED)
+    if img is None:
+        raise ValueError("OpenCV could not decode image data")
+
+    img_resized = cv2.resize(img, (width, height), interpolation=cv2.INTER_LANCZOS4)
+    if not cv2.imwrite(str(output_path), img_resized, [cv2.IMWRITE_PNG_COMPRESSION, 6]):
+        raise OSError(f"OpenCV could not write {output_path}")
+
+
+def _save_resized(image_data: bytes, output_path: Path, width: int, height: int):
+    """Decode raw image bytes and save them resized to exact dimensions"""
+    if cv2 is not None:
+        _save_resized_cv2(image_data, output_path, width, height)
+        return
+
+    # Decode straight from the response bytes, no temp file
+    img = Image.open(BytesIO(image_data))
+
+    # Let JPEG sources decode at reduced scale (no-op for other formats), then
+    # cheaply shrink anything larger than 2x the target so LANCZOS has less to do
+    img.draft(None, (width * 2, height * 2))
+    img.load()
+    img.thumbnail((width * 2, height * 2), Image.Resampling.BILINEAR)
+
+    # Resize to exact dimensions
+    img_resized = img.resize((width, height), Image.Resampling.LANCZOS)
+    # Default zlib level; optimize=True is far slower for little size gain
+    img_resized.save(output_path, "PNG", compress_level=6)
+
+
+async def _generate_content(prompt: str):
+    """Request an image from Gemini, backing off exponentially only when rate limited"""
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            return await client.aio.models.generate_content(
+                model=MODEL,
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    response_modalities=["IMAGE", "TEXT"],
+                )
             )
-        )
+        except errors.APIError as e:
+            if e.code != 429 or attempt == MAX_ATTEMPTS - 1:
+                raise
+            delay = 2 ** attempt
+            print(f"   Rate limited, retrying in {delay}s...")
+            await asyncio.sleep(delay)
 
-        if response.candidates and response.candidates[0].content.parts:
-            for part in response.candidates[0].content.parts:
-                if hasattr(part, 'inline_data') and part.inline_data:
-                    image_data = part.inline_data.data
 
-                    if image_data:
-                        # Save raw image
-                        with open(temp_path, 'wb') as f:
-                            f.write(image_data)
+async def generate_hero_image(prompt: str, output_path: Path, width: int = 1200, height: int = 630) -> bool:
+    """Generate a single hero image using Gemini"""
 
-                        # Resize to exact dimensions
-                        img = Image.open(temp_path)
-                        img_resized = img.resize((width, height), Image.Resampling.LANCZOS)
-                        img_resized.save(output_path, "PNG", optimize=True)
+    try:
+        response = await _generate_content(prompt)
 
-                        # Clean up temp file
-                        temp_path.unlink(missing_ok=True)
-                        return True
+        if response.candidates and response.candidates[0].content.parts:
+            for part in response.candidates[0].content.parts:
+                inline_data = getattr(part, 'inline_data', None)
+                if inline_data and inline_data.data:
+                    # Resize in a worker thread so other requests keep flowing
+                    await asyncio.to_thread(_save_resized, inline_data.data, output_path, width, height)
+                    return True
 
         return False
 
     except Exception as e:
-        print(f"   Error: {e}")
+        print(f"   Error ({output_path.name}): {e}")
         return False
 
 
+async def _generate_configs(output_dir: Path) -> list:
+    """Generate all configured images concurrently, returning per-image success"""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    total = len(HERO_CONFIGS)
+
+    async def generate_one(i: int, config: dict) -> bool:
+        filename, subject = config['filename'], config['subject']
+        async with semaphore:
+            print(f"\n[{i}/{total}] Generating: {filename}")
+            print(f"   Subject: {subject[:60]}...")
+
+            output_path = output_dir / filename
+            if await generate_hero_image(build_prompt(config), output_path):
+                file_size = output_path.stat().st_size / 1024
+                print(f"   Saved: {filename} ({file_size:.1f} KB)")
+                return True
+
+            print(f"   Failed to generate image: {filename}")
+            return False
+
+    return await asyncio.gather(
+        *(generate_one(i, config) for i, config in enumerate(HERO_CONFIGS, 1))
+    )
+
+
 def generate_all(output_dir: Path):
     """Generate all configured hero images"""
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -130,25 +213,10 @@ def generate_all(output_dir: Path):
     print(f"Output directory: {output_dir}")
     print(f"Images to generate: {len(HERO_CONFIGS)}")
 
-    successful = 0
-    failed = 0
-
-    for i, config in enumerate(HERO_CONFIGS, 1):
-        print(f"\n[{i}/{len(HERO_CONFIGS)}] Generating: {config['filename']}")
-        print(f"   Prompt: {config['prompt'][:60]}...")
-
-        output_path = output_dir / config['filename']
-        if generate_hero_image(config['prompt'], output_path):
-            file_size = output_path.stat().st_size / 1024
-            print(f"   Saved: {output_path.name} ({file_size:.1f} KB)")
-            successful += 1
-        else:
-            print(f"   Failed to generate image")
-            failed += 1
-
-        # Rate limiting
-        if i < len(HERO_CONFIGS):
-            time.sleep(3)
+    # The semaphore caps requests in flight; rate limits are handled by backoff
+    results = asyncio.run(_generate_configs(output_dir))
+    successful = sum(results)
+    failed = len(results) - successful
 
     print("\n" + "=" * 60)
     print(f"COMPLETE: {successful} successful, {failed} failed")
@@ -169,7 +237,7 @@ def generate_single(prompt: str, filename: str, output_dir: Path):
     print(f"Generating: {filename}")
     print(f"Prompt: {prompt[:80]}...")
 
-    if generate_hero_image(prompt, output_path):
+    if asyncio.run(generate_hero_image(prompt, output_path)):
         file_size = output_path.stat().st_size / 1024
         print(f"Saved: {output_path} ({file_size:.1f} KB)")
     else:
@@ -182,8 +250,9 @@ def list_configs():
     print("Configured hero images:")
     print("-" * 60)
     for i, config in enumerate(HERO_CONFIGS, 1):
-        print(f"{i}. {config['filename']}")
-        print(f"   {config['prompt'][:70]}...")
+        filename, subject = config['filename'], config['subject']
+        print(f"{i}. {filename}")
+        print(f"   {subject[:70]}...")
         print()
 
 